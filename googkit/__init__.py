@@ -24,10 +24,14 @@ def print_version():
 def main():
     """Run googkit.
     """
+    # Fast path: printing the version needs no command tree, plugins or
+    # logging setup, so skip them entirely.
+    if sys.argv[1:] == ['--version']:
+        print_version()
+        return
+
     cwd = os.getcwd()
-    logging.basicConfig(level=logging.INFO, format='%(message)s')
     tree = CommandTree()
-    googkit.lib.plugin.load(tree)
 
     arg = ArgumentParser.parse(sys.argv)
 
@@ -35,12 +39,17 @@ def main():
         print_version()
         sys.exit()
 
+    # Plugins are loaded as late as possible; the paths above never need
+    # them, so they do not pay the plugin directory scan and imports.
+    googkit.lib.plugin.load(tree)
+
     CommandClass = tree.command_class(arg.commands)
     if CommandClass is None:
         Help(tree, arg).print_help()
         sys.exit()
 
     try:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
         env = Environment(cwd, arg, tree)
         command = CommandClass(env)
         command.run()
@@ -6,9 +6,10 @@ import os.path
 import re
 import shutil
 import subprocess
+import sys
+import tempfile
 import googkit.lib.file
 import googkit.lib.path
-import googkit.lib.strutil
 from googkit.commands.command import Command
 from googkit.lib.option_builder import OptionBuilder
 from googkit.lib.dirutil import working_directory
@@ -26,6 +27,16 @@ class BuildCommand(Command):
     """
     HTML_LIKE_EXT = ('.xml', '.xhtml', '.xht', '.htm', '.html')
 
+    """RegExp that matches a line requiring scripts unneeded for production.
+    """
+    UNNEEDED_SCRIPT_PATTERN = re.compile(
+        rb'^[^\n]*<!--@(?:base_js|deps_js)@-->[^\n]*\n?', re.M)
+
+    """RegExp that matches a line requiring the main script.
+    """
+    REQUIRE_MAIN_PATTERN = re.compile(
+        rb'^([ \t]*)[^\n]*<!--@require_main@-->[^\n]*', re.M)
+
     class BuilderArguments(OptionBuilder):
         """Argument builder for Closure Builder.
 
@@ -76,13 +87,16 @@ class BuildCommand(Command):
         """Returns a callable ignore argument for copytree method by the
         specified ignore directories.
         """
+        ignore_set = frozenset(ignore_dirs)
+
         def ignoref(dirpath, files):
             return [filename for filename in files
-                    if (os.path.join(dirpath, filename) in ignore_dirs)]
+                    if (os.path.join(dirpath, filename) in ignore_set)]
         return ignoref
 
     def setup_files(self, target_dir, should_clean=False):
-        """Copy project resources to the specified directory path.
+        """Copy project resources to the specified directory path, converting
+        HTML-like resources for production in the same pass.
         Removes files already exist in the target directory if should_clean is
         True.
         """
@@ -102,45 +116,58 @@ class BuildCommand(Command):
         googkit.lib.file.copytree(
             devel_dir,
             target_dir,
-            ignore=BuildCommand.ignore_dirs(*ignores))
+            ignore=BuildCommand.ignore_dirs(*ignores),
+            transform=(BuildCommand.is_html_like, self._compile_resource_to))
 
-        for root, dirs, files in os.walk(target_dir):
-            for filename in files:
-                html_path = os.path.join(root, filename)
-                (base, ext) = os.path.splitext(html_path)
-                if ext not in BuildCommand.HTML_LIKE_EXT:
-                    continue
+    @classmethod
+    def is_html_like(cls, path):
+        """Whether the specified path looks like an HTML resource to compile.
+        """
+        return path.endswith(cls.HTML_LIKE_EXT)
+
+    def _compiled_resource(self, content, html_path):
+        """Returns production content for the specified development resource
+        content. Paths for development resources are replaced by paths for
+        compiled resources relative to html_path.
+        """
+        # Remove lines that requires unneeded scripts
+        content = BuildCommand.UNNEEDED_SCRIPT_PATTERN.sub(b'', content)
+
+        # Replace deps.js by a compiled script
+        compiled_js_path = os.path.relpath(
+            self.compiled_js_path(html_path), os.path.dirname(html_path))
+        script = '<script src="{src}"></script>'.format(src=compiled_js_path)
+        return BuildCommand.REQUIRE_MAIN_PATTERN.sub(
+            lambda m: m.group(1) + script.encode(), content)
+
+    def _compile_resource_to(self, src_path, dst_path):
+        """Converts the development resource read from src_path and writes
+        the production resource to dst_path.
+        """
+        with open(src_path, 'rb') as f:
+            content = f.read()
 
-                self.compile_resource(html_path)
+        with open(dst_path, 'wb') as f:
+            f.write(self._compiled_resource(content, dst_path))
 
     def compile_resource(self, html_path):
-        """Converts development resources for production resources.
+        """Converts development resources for production resources in place.
         For example, paths for development resources will be replaced by paths
         for compiled resources.
         """
-        lines = []
-
-        with open(html_path) as f:
-            for line in f:
-                # Remove lines that requires unneeded scripts
-                if line.find('<!--@base_js@-->') >= 0:
-                    continue
-                if line.find('<!--@deps_js@-->') >= 0:
-                    continue
-
-                # Replace deps.js by a compiled script
-                if line.find('<!--@require_main@-->') >= 0:
-                    indent = googkit.lib.strutil.line_indent(line)
-                    compiled_js_path = os.path.relpath(
-                        self.compiled_js_path(html_path), os.path.dirname(html_path))
-                    script = '<script src="{src}"></script>\n'.format(src=compiled_js_path)
-                    line = indent + script
-
-                lines.append(line)
-
-        with open(html_path, 'w') as f:
-            for line in lines:
-                f.write(line)
+        with open(html_path, 'rb') as f:
+            content = f.read()
+
+        content = self._compiled_resource(content, html_path)
+
+        # Replace the file atomically to avoid leaving a half-written
+        # resource behind if the build is interrupted.
+        with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(html_path), delete=False) as f:
+            f.write(content)
+
+        shutil.copymode(html_path, f.name)
+        os.replace(f.name, html_path)
 
     def namespace_by_html(self, html_path):
         """Returns a namespace key for main scripts by a path of the HTML.
@@ -159,21 +186,19 @@ class BuildCommand(Command):
     def _build(self, builder_args, project_root):
         builder = self.config.closurebuilder()
 
-        cmd = ['python', builder] + [str(arg) for arg in builder_args]
+        cmd = [sys.executable, builder] + [str(arg) for arg in builder_args]
 
-        popen_args = {
-            'stdout': subprocess.PIPE,
-            'stderr': subprocess.PIPE
-        }
+        # Only stderr is used, so drop stdout instead of buffering it.
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE)
 
-        builder_proc = subprocess.Popen(cmd, **popen_args)
-        result = builder_proc.communicate()
-
-        if builder_proc.returncode != 0:
+        if result.returncode != 0:
             raise GoogkitError(_('Compilation failed:\n{message}').format(
-                message=result[1].decode()))
+                message=result.stderr.decode()))
         else:
-            logging.debug(result[1].decode())
+            logging.debug(result.stderr.decode())
 
     def html_requiring_js(self):
         """Returns path list of HTMLs requiring built JavaScript.
@@ -193,7 +218,8 @@ class BuildCommand(Command):
         Removes old resources if should_clean is True.
         """
         config = self.config
-        self.setup_files(config.debug_dir(), should_clean)
+        debug_dir = config.debug_dir()
+        self.setup_files(debug_dir, should_clean)
 
         logging.info(_('Building for debug: ') + html_path)
         args = self.debug_arguments(html_path, project_root)
@@ -204,7 +230,7 @@ class BuildCommand(Command):
         # So set 'sourceRoot' to 'project_root' directory manually until
         # Closure Compiler supports this feature.
         html_relpath = os.path.relpath(html_path, config.development_dir())
-        debug_html_path = os.path.join(config.debug_dir(), html_relpath)
+        debug_html_path = os.path.join(debug_dir, html_relpath)
         compiled_js_path = self.compiled_js_path(debug_html_path)
         source_map_path = compiled_js_path + '.map'
 
@@ -293,20 +319,43 @@ class BuildCommand(Command):
         """
         source_root = os.path.relpath(project_root, self.config.debug_dir())
 
-        with open(source_map) as source_map_file:
-            source_map_content = json.load(source_map_file)
+        with open(source_map, 'rb') as source_map_file:
+            content = source_map_file.read()
+
+        rest = content.lstrip()[1:]
+
+        if b'"sourceRoot"' in content or not rest or rest.lstrip()[:1] == b'}':
+            # A sourceRoot is already present to replace, or the map is
+            # an empty object where splicing a comma in would produce
+            # invalid JSON; do a full JSON round-trip.
+            source_map_content = json.loads(content)
             source_map_content['sourceRoot'] = source_root
+            content = json.dumps(source_map_content).encode()
+        else:
+            # The map is a single JSON object, so inject the attribute
+            # right after the opening brace without re-encoding the whole
+            # (potentially multi-MB) map.
+            content = (b'{"sourceRoot": '
+                       + json.dumps(source_root).encode()
+                       + b','
+                       + rest)
+
+        with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(source_map) or '.', delete=False) as f:
+            f.write(content)
 
-        with open(source_map, 'w') as source_map_file:
-            json.dump(source_map_content, source_map_file)
+        shutil.copymode(source_map, f.name)
+        os.replace(f.name, source_map)
 
     def run_internal(self):
         project_root = googkit.lib.path.project_root(self.env.cwd)
         with working_directory(project_root):
-            should_clean = self.env.argument.option('--clean')
+            argument = self.env.argument
+            should_clean = argument.option('--clean')
+            is_debug = argument.option('--debug')
 
             for html_path in self.html_requiring_js():
-                if self.env.argument.option('--debug'):
+                if is_debug:
                     self.build_debug(html_path, project_root, should_clean)
                 else:
                     self.build_production(html_path, project_root, should_clean)
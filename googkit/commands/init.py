@@ -1,6 +1,6 @@
-import distutils.core
 import logging
 import os
+import shutil
 import googkit.lib.path
 from googkit.commands.command import Command
 from googkit.lib.error import GoogkitError
@@ -13,12 +13,14 @@ class InitCommand(Command):
         """
         template_dir = googkit.lib.path.template()
 
-        conflicted = set(os.listdir(dst_dir)) & set(os.listdir(template_dir))
+        template_names = {entry.name for entry in os.scandir(template_dir)}
+        conflicted = [entry.name for entry in os.scandir(dst_dir)
+                      if entry.name in template_names]
         if conflicted:
             raise GoogkitError(_('Conflicted files: {files}').format(
                 files=', '.join(conflicted)))
 
-        distutils.dir_util.copy_tree(template_dir, dst_dir)
+        shutil.copytree(template_dir, dst_dir, dirs_exist_ok=True)
 
     def run_internal(self):
         cwd = self.env.cwd
@@ -1,10 +1,4 @@
-from googkit.commands.build import BuildCommand
-from googkit.commands.candidates import CandidatesCommand
-from googkit.commands.init import InitCommand
-from googkit.commands.lint import LintCommand
-from googkit.commands.ready import ReadyCommand
-from googkit.commands.setup import SetupCommand
-from googkit.commands.update_deps import UpdateDepsCommand
+import importlib
 
 
 class CommandTree(object):
@@ -12,20 +6,24 @@ class CommandTree(object):
     """
 
     """Default command tree.
+    Each leaf is a (module name, class name) pair so that command modules
+    are imported only when the command is actually looked up; most
+    invocations run a single command, and importing all of them up-front
+    slows the CLI startup down.
     """
     DEFAULT_TREE = {
-        '_candidates': CandidatesCommand,
-        'build': BuildCommand,
+        '_candidates': ('googkit.commands.candidates', 'CandidatesCommand'),
+        'build': ('googkit.commands.build', 'BuildCommand'),
         'config': {
-            'apply': ReadyCommand
+            'apply': ('googkit.commands.ready', 'ReadyCommand')
         },
         'deps': {
-            'update': UpdateDepsCommand
+            'update': ('googkit.commands.update_deps', 'UpdateDepsCommand')
         },
-        'init': InitCommand,
-        'lint': LintCommand,
-        'ready': ReadyCommand,
-        'setup': SetupCommand,
+        'init': ('googkit.commands.init', 'InitCommand'),
+        'lint': ('googkit.commands.lint', 'LintCommand'),
+        'ready': ('googkit.commands.ready', 'ReadyCommand'),
+        'setup': ('googkit.commands.setup', 'SetupCommand'),
     }
 
     def __init__(self, tree=None):
@@ -37,6 +35,52 @@ class CommandTree(object):
         else:
             self._tree = tree
 
+        self._resolved = {}
+        self._flatten()
+
+    def _resolve(self, spec):
+        """Resolves a (module name, class name) pair into the command class,
+        importing the module on first access. Leaves that already are
+        command classes (e.g. registered by plugins) are passed through.
+        """
+        if type(spec) is not tuple:
+            return spec
+
+        cls = self._resolved.get(spec)
+        if cls is None:
+            module_name, class_name = spec
+            cls = getattr(importlib.import_module(module_name), class_name)
+            self._resolved[spec] = cls
+
+        return cls
+
+    def _flatten(self):
+        """Flattens the nested tree into lookup tables so that command
+        dispatch is a single dict hit instead of a recursive descent:
+
+        - self._flat maps a full command path tuple to its command class
+        - self._children maps each sub-tree path tuple to the sorted list
+          of its available (non-internal) command names
+        """
+        flat = {}
+        children = {}
+
+        def visit(node, path):
+            children[path] = sorted(
+                name for name in node if not name.startswith('_'))
+
+            for name, value in node.items():
+                child_path = path + (name,)
+                if type(value) is dict:
+                    visit(value, child_path)
+                else:
+                    flat[child_path] = value
+
+        visit(self._tree, ())
+
+        self._flat = flat
+        self._children = children
+
     def right_commands(self, args):
         """Returns a valid command part of the specified arguments.
 
@@ -49,20 +93,20 @@ class CommandTree(object):
             >>> cmd_tree.right_commands(['sub_cmd', 'sub_sub_cmd', 'invalid'])
             ['sub_cmd', 'sub_sub_cmd']
         """
-        command_dict = self._tree
         result = []
+        path = ()
 
         for arg in args:
-            next_dict = command_dict.get(arg)
-            if next_dict is None:
-                break
+            path += (arg,)
 
-            result.append(arg)
+            if path in self._flat:
+                result.append(arg)
+                break
 
-            if not isinstance(next_dict, dict):
+            if path not in self._children:
                 break
 
-            command_dict = next_dict
+            result.append(arg)
 
         return result
 
@@ -70,7 +114,7 @@ class CommandTree(object):
     def is_internal_command(cls, name):
         """Whether the specified command is an internal command.
         """
-        return name[0] == '_'
+        return name.startswith('_')
 
     def available_commands(self, args=[]):
         """Returns available command list.
@@ -88,20 +132,7 @@ class CommandTree(object):
             >>> cmd_tree.available_commands()
             ['sub_sub_cmd1', 'sub_sub_cmd2']
         """
-        command_dict = self._tree
-
-        for arg in args:
-            next_dict = command_dict.get(arg)
-            if next_dict is None:
-                return []
-
-            command_dict = next_dict
-
-        if not isinstance(command_dict, dict):
-            return []
-
-        commands = command_dict.keys()
-        return sorted([cmd for cmd in commands if not CommandTree.is_internal_command(cmd)])
+        return self._children.get(tuple(args), [])
 
     def command_class(self, args):
         """Returns a command class by the arguments.
@@ -115,28 +146,11 @@ class CommandTree(object):
             >>> cmd_tree.command_class(['sub_cmd', 'sub_sub_cmd'])
             Command
         """
-        value = self._tree
-
         # REVIEW: is there a better way...?
         if len(args) > 1 and args[0] == '_candidates':
-            return self._tree['_candidates']
-
-        depth = 0
-        for arg in args:
-            next_value = value.get(arg)
-            depth += 1
-
-            if not isinstance(next_value, dict):
-                if depth != len(args):
-                    # Extra argument found after existing commands
-                    # REVIEW: should raise an error?
-                    return None
-
-                return next_value
-
-            value = next_value
+            return self._resolve(self._tree['_candidates'])
 
-        return None
+        return self._resolve(self._flat.get(tuple(args)))
 
     def register(self, names, commands):
         """Registers a commands by each name.
@@ -153,3 +167,4 @@ class CommandTree(object):
             command_dict = command_dict[name]
 
         command_dict[names[-1]] = commands
+        self._flatten()
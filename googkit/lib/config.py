@@ -1,5 +1,16 @@
+import configparser
+import functools
 import os
-import googkit.compat.configparser as configparser
+
+
+@functools.lru_cache(maxsize=4)
+def _read_config(path, mtime):
+    """Returns a content of the specified config file.
+    The result is cached by (path, mtime); the user config and the default
+    config rarely change within a process but are loaded for every command.
+    """
+    with open(path) as fp:
+        return fp.read()
 
 
 class Config(object):
@@ -10,13 +21,8 @@ class Config(object):
         if path is None:
             return
 
-        with open(path) as fp:
-            if hasattr(self.parser, 'read_file'):
-                # Python 3.2 or later
-                self.parser.read_file(fp)
-            else:
-                # Python 3.1 or earlier
-                self.parser.readfp(fp)
+        content = _read_config(path, os.path.getmtime(path))
+        self.parser.read_string(content, source=path)
 
     def load(self, project_path, user_path, default_path):
         """Loads 3 config files (project config, user config, default config).
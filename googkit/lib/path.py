@@ -126,7 +126,7 @@ def locale():
 
 def replace_base(target, old_base, new_base):
     """Replace a base directory in the target path with the new one.
+    The target path should be under the old base directory.
     """
-    prefix = os.path.commonprefix([target, old_base])
-    diff = target[len(prefix) + 1:]
+    diff = target[len(old_base.rstrip(os.sep)) + 1:]
     return os.path.join(new_base, diff)
@@ -65,6 +65,7 @@ setup(
             'googkit=googkit:main'
         ]
     },
+    python_requires='>=3.8',
     install_requires=[
         'closure_linter'
     ],
@@ -1,7 +1,11 @@
 import unittest
 import doctest
+import json
 import os
+import shutil
 import subprocess
+import sys
+import tempfile
 
 from googkit.compat.unittest import mock
 from test.stub_config import StubConfig, StubConfigOnStubProject
@@ -22,48 +26,36 @@ class TestBuildCommand(unittest.TestCase):
         self.assertTrue(BuildCommand.needs_project_config())
 
     def test_compile_resource(self):
-        tgt_path = '/tmp/foo/bar'
+        tmp_dir = tempfile.mkdtemp()
+        tgt_path = os.path.join(tmp_dir, 'bar.html')
 
-        # Data will be given by for-in statement with open()
         read_data = '''\
 DUMMY
 <!--@base_js@-->
  <!--@deps_js@-->
   <!--@require_main@-->
-   <!--@dummy_marker@-->'''
+   <!--@dummy_marker@-->
+'''
 
-        # Expected data will be given by open.write()
         expected = '''\
 DUMMY
   <script src="bar.JS"></script>
-   <!--@dummy_marker@-->'''
+   <!--@dummy_marker@-->
+'''
 
-        # Use mock_open
-        mock_open = mock.mock_open(read_data=read_data)
+        with open(tgt_path, 'w') as f:
+            f.write(read_data)
 
-        # Context Manager is a return value of the mock_open.__enter__
-        mock_fp = mock_open.return_value.__enter__.return_value
+        self.cmd.compile_resource(tgt_path)
 
-        # Read lines has "\n" at each last
-        mock_fp.__iter__.return_value = iter([(line + '\n') for line in read_data.split('\n')])
+        with open(tgt_path) as f:
+            self.assertEqual(f.read(), expected)
 
-        # Switch to the mock_open from the original open
-        with mock.patch('os.sep', new='/'), \
-                mock.patch('googkit.commands.build.open', mock_open, create=True):
-            self.cmd.compile_resource(tgt_path)
-
-        # Expected the target file was opened twice for reading and writing
-        mock_open.assert_any_call(tgt_path)
-        mock_open.assert_any_call(tgt_path, 'w')
-
-        # Expected correct data was wrote
-        self.assertEqual(
-            mock_fp.write.call_args_list,
-            [mock.call(line + '\n',) for line in expected.split('\n')])
+        shutil.rmtree(tmp_dir)
 
     def test_setup_files(self):
         self.cmd.config = StubConfigOnStubProject()
-        self.cmd.compile_resource = mock.MagicMock()
+        self.cmd._compile_resource_to = mock.MagicMock()
 
         with mock.patch.object(BuildCommand, 'ignore_dirs') as mock_ignore_dirs, \
                 mock.patch('googkit.lib.file.copytree') as mock_copytree:
@@ -74,10 +66,14 @@ DUMMY
         mock_copytree.assert_called_once_with(
             StubConfigOnStubProject.DEVELOPMENT_DIR,
             StubConfigOnStubProject.PRODUCTION_DIR,
-            ignore='IGNORE')
+            ignore='IGNORE',
+            transform=(BuildCommand.is_html_like, self.cmd._compile_resource_to))
+
+    def test_is_html_like(self):
+        self.assertTrue(BuildCommand.is_html_like('index.html'))
+        self.assertTrue(BuildCommand.is_html_like('dir/index.xhtml'))
 
-        self.cmd.compile_resource.assert_any_call(
-            os.path.join(StubConfigOnStubProject.PRODUCTION_DIR, 'index.html'))
+        self.assertFalse(BuildCommand.is_html_like('main.js'))
 
     def test_debug_arguments(self):
         expected = BuildCommand.BuilderArguments()
@@ -168,18 +164,19 @@ DUMMY
         self.cmd.production_arguments = mock.MagicMock()
         self.cmd.production_arguments.return_value = ['ARG']
 
-        MockPopen = mock.MagicMock()
-        mock_popen = MockPopen.return_value
+        MockRun = mock.MagicMock()
+        mock_result = MockRun.return_value
         # It simulates the command was succeeded
-        mock_popen.returncode = 0
+        mock_result.returncode = 0
+        mock_result.stderr = b''
 
-        with mock.patch('subprocess.Popen', new=MockPopen):
+        with mock.patch('subprocess.run', new=MockRun):
             self.cmd.build_production(StubConfig.PROJECT_DIR, False)
 
         self.cmd.setup_files.assert_called_once_with(StubConfig.PRODUCTION_DIR, False)
-        MockPopen.assert_called_once_with(
-            ['python', StubConfig.CLOSUREBUILDER, 'ARG'],
-            stdout=subprocess.PIPE,
+        MockRun.assert_called_once_with(
+            [sys.executable, StubConfig.CLOSUREBUILDER, 'ARG'],
+            stdout=subprocess.DEVNULL,
             stderr=subprocess.PIPE)
 
     def test_build_debug(self):
@@ -190,18 +187,19 @@ DUMMY
         self.cmd.compiled_js_path.return_value = 'dummy.JS'
         self.cmd.modify_source_map = mock.MagicMock()
 
-        MockPopen = mock.MagicMock()
-        mock_popen = MockPopen.return_value
+        MockRun = mock.MagicMock()
+        mock_result = MockRun.return_value
         # It simulates the command was succeeded
-        mock_popen.returncode = 0
+        mock_result.returncode = 0
+        mock_result.stderr = b''
 
-        with mock.patch('subprocess.Popen', new=MockPopen):
+        with mock.patch('subprocess.run', new=MockRun):
             self.cmd.build_debug('dummy.html', StubConfig.PROJECT_DIR, False)
 
         self.cmd.setup_files.assert_called_once_with(StubConfig.DEBUG_DIR, False)
-        MockPopen.assert_called_once_with(
-            ['python', StubConfig.CLOSUREBUILDER, 'ARG'],
-            stdout=subprocess.PIPE,
+        MockRun.assert_called_once_with(
+            [sys.executable, StubConfig.CLOSUREBUILDER, 'ARG'],
+            stdout=subprocess.DEVNULL,
             stderr=subprocess.PIPE)
 
         self.cmd.modify_source_map.assert_called_once_with(
@@ -209,7 +207,51 @@ DUMMY
             StubConfig.PROJECT_DIR)
 
     def test_modify_source_map(self):
-        # Data will be given by open()
+        stub_source_map = {
+            'dummy': 'do not change me'
+        }
+
+        expected = {
+            'sourceRoot': os.path.relpath(StubConfig.PROJECT_DIR, StubConfig.DEBUG_DIR),
+            'dummy': 'do not change me'
+        }
+
+        tmp_dir = tempfile.mkdtemp()
+        source_map = os.path.join(tmp_dir, 'dummy.js.map')
+        with open(source_map, 'w') as f:
+            json.dump(stub_source_map, f)
+        os.chmod(source_map, 0o644)
+
+        self.cmd.modify_source_map(source_map, StubConfig.PROJECT_DIR)
+
+        with open(source_map) as f:
+            self.assertEqual(json.load(f), expected)
+
+        # The map should stay servable over HTTP
+        self.assertEqual(
+            os.stat(source_map).st_mode & 0o777, 0o644,
+            'File mode should be preserved')
+
+        shutil.rmtree(tmp_dir)
+
+    def test_modify_source_map_with_empty_map(self):
+        expected = {
+            'sourceRoot': os.path.relpath(StubConfig.PROJECT_DIR, StubConfig.DEBUG_DIR)
+        }
+
+        tmp_dir = tempfile.mkdtemp()
+        source_map = os.path.join(tmp_dir, 'dummy.js.map')
+        with open(source_map, 'w') as f:
+            f.write('{}')
+
+        self.cmd.modify_source_map(source_map, StubConfig.PROJECT_DIR)
+
+        with open(source_map) as f:
+            self.assertEqual(json.load(f), expected)
+
+        shutil.rmtree(tmp_dir)
+
+    def test_modify_source_map_with_existing_source_root(self):
         stub_source_map = {
             'sourceRoot': 'change me',
             'dummy': 'do not change me'
@@ -220,19 +262,17 @@ DUMMY
             'dummy': 'do not change me'
         }
 
-        mock_open = mock.mock_open()
-        dummy_source_map_file = 'DUMMY'
+        tmp_dir = tempfile.mkdtemp()
+        source_map = os.path.join(tmp_dir, 'dummy.js.map')
+        with open(source_map, 'w') as f:
+            json.dump(stub_source_map, f)
 
-        with mock.patch('googkit.commands.build.json') as mock_json, \
-                mock.patch('googkit.commands.build.open', new=mock_open, create=True):
-            mock_open.return_value.__enter__.return_value = dummy_source_map_file
-            mock_json.load.return_value = stub_source_map
+        self.cmd.modify_source_map(source_map, StubConfig.PROJECT_DIR)
 
-            self.cmd.modify_source_map(dummy_source_map_file, StubConfig.PROJECT_DIR)
+        with open(source_map) as f:
+            self.assertEqual(json.load(f), expected)
 
-        mock_json.load.assert_called_once_with(dummy_source_map_file)
-        self.assertEqual(mock_json.dump.call_args[0][0], expected)
-        self.assertEqual(mock_json.dump.call_count, 1)
+        shutil.rmtree(tmp_dir)
 
     def test_run_internal(self):
         self.cmd.build_debug = mock.MagicMock()
@@ -17,39 +17,45 @@ class TestInitCommand(unittest.TestCase):
     def test_needs_project_config(self):
         self.assertFalse(InitCommand.needs_project_config())
 
+    def _stub_scandir(self, contents):
+        def scandir(path):
+            if path not in contents:
+                self.fail('Unexpected path: ' + path)
+
+            for name in contents[path]:
+                entry = mock.MagicMock()
+                entry.name = name
+                yield entry
+        return scandir
+
     def test_copy_templates(self):
         dst_path = '/tmp/foo/bar'
         template_dir = '/tmp/dummy'
 
-        def listdir(path):
-            if path == dst_path:
-                return ['dummy1', 'dummy2']
-            elif path == template_dir:
-                return ['dummy3']
-            else:
-                self.failed('Unexpected path: ' + path)
+        scandir = self._stub_scandir({
+            dst_path: ['dummy1', 'dummy2'],
+            template_dir: ['dummy3']
+        })
 
-        with mock.patch('os.listdir', side_effect=listdir) as mock_listdir, \
-                mock.patch('distutils.dir_util.copy_tree') as mock_copytree, \
+        with mock.patch('os.scandir', side_effect=scandir), \
+                mock.patch('shutil.copytree') as mock_copytree, \
                 mock.patch('googkit.lib.path.template', return_value=template_dir):
             self.cmd.copy_template(dst_path)
 
-        mock_copytree.assert_called_once_with(template_dir, dst_path)
+        mock_copytree.assert_called_once_with(
+            template_dir, dst_path, dirs_exist_ok=True)
 
     def test_copy_templates_with_conflict(self):
         dst_path = '/tmp/foo/bar'
         template_dir = '/tmp/dummy'
 
-        def listdir(path):
-            if path == dst_path:
-                return ['dummy1', 'dummy2', 'conflicted']
-            elif path == template_dir:
-                return ['dummy3', 'conflicted']
-            else:
-                self.failed('Unexpected path: ' + path)
+        scandir = self._stub_scandir({
+            dst_path: ['dummy1', 'dummy2', 'conflicted'],
+            template_dir: ['dummy3', 'conflicted']
+        })
 
-        with mock.patch('os.listdir', side_effect=listdir) as mock_listdir, \
-                mock.patch('distutils.dir_util.copy_tree'), \
+        with mock.patch('os.scandir', side_effect=scandir), \
+                mock.patch('shutil.copytree'), \
                 mock.patch('googkit.lib.path.template', return_value=template_dir):
             with self.assertRaises(GoogkitError):
                 self.cmd.copy_template(dst_path)
@@ -1,7 +1,7 @@
+import configparser
 import unittest
 import os
 
-import googkit.compat.configparser as configparser
 from googkit.lib.config import Config
 
 
@@ -18,12 +18,7 @@ class TestConfig(unittest.TestCase):
         self.cfg.parser = configparser.ConfigParser()
 
         with open(DEFAULT_CONFIG) as fp:
-            if hasattr(self.cfg.parser, 'read_file'):
-                # Python 3.2 or later
-                self.cfg.parser.read_file(fp)
-            else:
-                # Python 3.1 or earlier
-                self.cfg.parser.readfp(fp)
+            self.cfg.parser.read_file(fp)
 
     def test_load_with_no_user_config(self):
         cfg = Config()
@@ -1,6 +1,7 @@
 import os
 import shutil
 import tempfile
+import time
 import unittest
 import googkit.lib.file
 from googkit.compat.unittest import mock
@@ -100,6 +101,82 @@ class TestFile(unittest.TestCase):
         shutil.rmtree(src_dir)
         shutil.rmtree(dst_dir)
 
+    def test_copytree_skips_up_to_date_files(self):
+        src_dir = tempfile.mkdtemp()
+        self._build_structure(src_dir, {
+            'file': 'src'
+        })
+
+        dst_dir = tempfile.mkdtemp()
+        googkit.lib.file.copytree(src_dir, dst_dir)
+
+        # Rewrite the copy with same-size content; it is now newer than
+        # the source, so another copy should leave it untouched
+        dst_file = os.path.join(dst_dir, 'file')
+        with open(dst_file, 'w') as f:
+            f.write('DST')
+
+        googkit.lib.file.copytree(src_dir, dst_dir)
+
+        with open(dst_file) as f:
+            self.assertEqual(
+                f.read(), 'DST',
+                'Up-to-date file should not be copied again')
+
+        # A source modified after the copy should be copied again
+        src_file = os.path.join(src_dir, 'file')
+        with open(src_file, 'w') as f:
+            f.write('changed')
+        future = time.time() + 10
+        os.utime(src_file, (future, future))
+
+        googkit.lib.file.copytree(src_dir, dst_dir)
+
+        with open(dst_file) as f:
+            self.assertEqual(
+                f.read(), 'changed',
+                'Modified source should be copied again')
+
+        shutil.rmtree(src_dir)
+        shutil.rmtree(dst_dir)
+
+    def test_copytree_with_transform(self):
+        src_dir = tempfile.mkdtemp()
+        self._build_structure(src_dir, {
+            'page.html': 'content',
+            'file': 'content'
+        })
+
+        dst_dir = tempfile.mkdtemp()
+        os.chmod(os.path.join(src_dir, 'page.html'), 0o755)
+
+        def predicate(path):
+            return path.endswith('.html')
+
+        def transform(src, dst):
+            with open(src) as src_file, open(dst, 'w') as dst_file:
+                dst_file.write(src_file.read().upper())
+
+        googkit.lib.file.copytree(
+            src_dir, dst_dir, transform=(predicate, transform))
+
+        with open(os.path.join(dst_dir, 'page.html')) as f:
+            self.assertEqual(
+                f.read(), 'CONTENT',
+                'Matching file should be transformed')
+        with open(os.path.join(dst_dir, 'file')) as f:
+            self.assertEqual(
+                f.read(), 'content',
+                'Other file should be copied as is')
+
+        dst_mode = os.stat(os.path.join(dst_dir, 'page.html')).st_mode
+        self.assertEqual(
+            dst_mode & 0o777, 0o755,
+            'Transformed file should keep the source file mode')
+
+        shutil.rmtree(src_dir)
+        shutil.rmtree(dst_dir)
+
     def test_executable(self):
         with mock.patch('os.path.isfile', return_value=True), \
                 mock.patch('os.access', return_value=True):
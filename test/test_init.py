@@ -41,7 +41,8 @@ class TestGoogkit(unittest.TestCase):
             with self.assertRaises(SystemExit):
                 googkit.main()
 
-        mock_basic_cfg.assert_called_once_with(level=logging.INFO, format='%(message)s')
+        # Logging setup is deferred until a command actually runs
+        self.assertFalse(mock_basic_cfg.called)
 
         self.assertTrue(MockHelp.return_value.print_help.called)
 
@@ -58,7 +59,8 @@ class TestGoogkit(unittest.TestCase):
             with self.assertRaises(SystemExit):
                 googkit.main()
 
-        mock_basic_cfg.assert_called_once_with(level=logging.INFO, format='%(message)s')
+        # Logging setup is deferred until a command actually runs
+        self.assertFalse(mock_basic_cfg.called)
 
         self.assertTrue(MockHelp.return_value.print_help.called)
 